@@ -10,15 +10,280 @@ import sqlite3
 import os
 import re
 import hashlib
+import mmap
 import time
 import threading
+import queue
 import subprocess
 import json
+import types
+import functools
+import errno
+import importlib.util
 from pathlib import Path
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+try:
+    import mutagen
+except ImportError:
+    mutagen = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Keep compiled kernels across runs so only the first launch pays for JIT
+if importlib.util.find_spec('numba') is not None:
+    os.environ.setdefault('NUMBA_CACHE_DIR', str(Path.home() / '.music_scanner_numba'))
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+# Number of analyzed files buffered before writing to the scanner database
+SCAN_BATCH_SIZE = 500
+
+# Minimum seconds between scan progress updates (~30 Hz)
+PROGRESS_INTERVAL = 0.033
+
+# Bytes hashed from each end of a file for change detection
+HASH_SAMPLE_SIZE = 65536
+
+# Worker threads used to stat, hash and ffprobe files during a scan
+SCAN_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Most files submitted to the scan workers at once, so large libraries don't hold a future per file
+SCAN_QUEUE_SIZE = SCAN_WORKERS * 4
+
+# Threads used to apply renames; they are independent syscalls
+RENAME_WORKERS = 8
+
+# Most recently used (path, mtime) entries kept in the file tag cache
+TAG_CACHE_SIZE = 20000
+
+# Rename preview rows updated per Tk callback while applying renames
+RENAME_STATUS_BATCH = 64
+
+# Worker-to-UI message queue: drain interval and max messages handled per tick
+UI_QUEUE_INTERVAL_MS = 50
+UI_QUEUE_BATCH = 200
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def match_tracks(bpm_arr, key_codes, key_ok, bpm_min, bpm_max):
+        """Flag tracks inside the BPM window whose key code is compatible"""
+        matched = np.zeros(bpm_arr.size, dtype=np.bool_)
+        for i in prange(bpm_arr.size):
+            if bpm_arr[i] >= bpm_min and bpm_arr[i] <= bpm_max and key_ok[key_codes[i]]:
+                matched[i] = True
+        return matched
+else:
+    match_tracks = None
+
+# Set once match_tracks is compiled; until then ranking uses plain NumPy so the UI never waits on JIT
+_KERNEL_READY = threading.Event()
+
+def warm_match_tracks():
+    """Compile (or load from cache) match_tracks for the library array dtypes"""
+    if match_tracks is None:
+        return
+    try:
+        match_tracks(np.zeros(1, dtype=np.float64), np.zeros(1, dtype=np.int32),
+                     np.zeros(1, dtype=bool), 0.0, 0.0)
+    except Exception as e:
+        print(f"Error compiling ranking kernel: {e}")
+        return
+    _KERNEL_READY.set()
+
+# Characters not allowed in generated filenames
+_INVALID_FILENAME_CHARS = str.maketrans('', '', '<>:"/\\|?*')
+
+# Control characters that str.split() doesn't already treat as whitespace
+_CONTROL_CHARS = {c: None for c in (*range(0x20), 0x7f) if not chr(c).isspace()}
+
+def clean_tag_value(value):
+    """Flatten a tag value onto one line: drop control characters and collapse whitespace"""
+    if not value:
+        return value
+    return ' '.join(value.translate(_CONTROL_CHARS).split())
+
+# Bitrate/format/quality words stripped from filenames
+_QUALITY_TAGS = ('320', '128', '192', '256', 'kbps', 'mp3', 'flac', 'wav', 'official', 'audio', 'hq', 'hd')
+
+def strip_track_prefix(text):
+    """Remove a leading track number, then a "track" prefix, without the regex engine"""
+    i = 0
+    n = len(text)
+    while i < 3 and i < n and text[i].isdecimal():
+        i += 1
+    if i:
+        while i < n and (text[i] in '.-_' or text[i].isspace()):
+            i += 1
+    
+    if text[i:i + 5].lower() == 'track':
+        i += 5
+        while i < n and (text[i] in '-_' or text[i].isspace()):
+            i += 1
+        while i < n and text[i].isdecimal():
+            i += 1
+        while i < n and (text[i] in '-_' or text[i].isspace()):
+            i += 1
+    
+    return text[i:]
+
+# Filename cleanup patterns, applied in this order by clean_filename_part
+_WHITESPACE_RE = re.compile(r'[_\s]+')  # Underscores and runs of whitespace to single spaces
+_QUALITY_TAGS_RE = re.compile(
+    r'\s*[\(\[]*(' + '|'.join(_QUALITY_TAGS) + r')[\)\]]*\s*', re.IGNORECASE
+)
+
+# Literal matcher for the quality words; no word contains another, so matches arrive in start order
+if ahocorasick is not None:
+    _QUALITY_TAGS_AUTOMATON = ahocorasick.Automaton()
+    for _tag in _QUALITY_TAGS:
+        _QUALITY_TAGS_AUTOMATON.add_word(_tag, len(_tag))
+    _QUALITY_TAGS_AUTOMATON.make_automaton()
+else:
+    _QUALITY_TAGS_AUTOMATON = None
+
+def strip_quality_tags(text):
+    """Remove quality words like _QUALITY_TAGS_RE.sub('', text) in one linear scan (ASCII text only)"""
+    parts = []
+    pos = 0
+    for end, length in _QUALITY_TAGS_AUTOMATON.iter(text.lower()):
+        start = end - length + 1
+        if start < pos:
+            continue
+        
+        # Widen over opening brackets then whitespace before, closing brackets then whitespace after
+        while start > pos and text[start - 1] in '([':
+            start -= 1
+        while start > pos and text[start - 1].isspace():
+            start -= 1
+        end += 1
+        while end < len(text) and text[end] in ')]':
+            end += 1
+        while end < len(text) and text[end].isspace():
+            end += 1
+        
+        parts.append(text[pos:start])
+        pos = end
+    
+    if not parts:
+        return text
+    parts.append(text[pos:])
+    return ''.join(parts)
+
+_SEP_RE = re.compile(r'\s*[-_]+\s*')  # Clean separators
+_UNICODE_DASH_RE = re.compile(r'\s*[–—]\s*')  # Unicode dashes
+
+# Linear-time RE2 versions of the cleanup patterns for ASCII text, where \s is spelled out to match re's
+if re2 is not None:
+    _ASCII_SPACE = r'\t\n\x0b\x0c\r\x1c-\x1f '
+    _ASCII_WHITESPACE_RE = re2.compile(r'[_' + _ASCII_SPACE + r']+')
+    _ASCII_QUALITY_TAGS_RE = re2.compile(
+        r'(?i)[' + _ASCII_SPACE + r']*[\(\[]*(' + '|'.join(_QUALITY_TAGS) + r')[\)\]]*[' + _ASCII_SPACE + r']*'
+    )
+    _ASCII_SEP_RE = re2.compile(r'[' + _ASCII_SPACE + r']*[-_]+[' + _ASCII_SPACE + r']*')
+else:
+    _ASCII_WHITESPACE_RE = _WHITESPACE_RE
+    _ASCII_QUALITY_TAGS_RE = _QUALITY_TAGS_RE
+    _ASCII_SEP_RE = _SEP_RE
+
+# Final casing for words smart_capitalize treats specially, keyed by lowercase form
+_CASE_MAP = {
+    **{w: w for w in ('a', 'an', 'and', 'as', 'at', 'but', 'by', 'for', 'if',
+                      'in', 'of', 'on', 'or', 'the', 'to', 'up', 'vs', 'with')},
+    **{w: w.upper() for w in ('dj', 'mc', 'uk', 'usa', 'nyc', 'la', 'sf', 'tv', 'fm', 'am')},
+}
+
+# Artist/title separators, tried in order on cleaned filenames
+_ARTIST_SEPARATORS = (' - ', ' by ')
+
+# Filename part cleanup; libraries repeat artist names and album tags, so results are cached
+@functools.lru_cache(maxsize=8192)
+def clean_filename_part(text):
+    """Clean up a filename part (artist or title)"""
+    if not text:
+        return ""
+    
+    # Already-tidy ASCII text that none of the patterns would touch only needs whitespace collapsed
+    if text.isascii() and '_' not in text and '-' not in text and not text[0].isdigit():
+        lowered = text.lower()
+        if not lowered.startswith('track') and not any(tag in lowered for tag in _QUALITY_TAGS):
+            return smart_capitalize(' '.join(text.split()))
+    
+    # Apply cleanup patterns
+    text = strip_track_prefix(text)
+    if text.isascii():
+        # No unicode dashes to rewrite in ASCII text
+        text = _ASCII_WHITESPACE_RE.sub(' ', text)
+        if _QUALITY_TAGS_AUTOMATON is not None:
+            text = strip_quality_tags(text)
+        else:
+            text = _ASCII_QUALITY_TAGS_RE.sub('', text)
+        text = _ASCII_SEP_RE.sub(' - ', text)
+    else:
+        text = _WHITESPACE_RE.sub(' ', text)
+        text = _QUALITY_TAGS_RE.sub('', text)
+        text = _SEP_RE.sub(' - ', text)
+        text = _UNICODE_DASH_RE.sub(' - ', text)
+    
+    # Only plain spaces and dashes can be left at the ends by now
+    text = text.strip(' -')
+    
+    # Smart capitalization
+    return smart_capitalize(text.strip())
+
+@functools.lru_cache(maxsize=8192)
+def smart_capitalize(text):
+    """Smart capitalization for music titles"""
+    if not text:
+        return ""
+    
+    words = text.split()
+    if not words:
+        return ""
+    get_cased = _CASE_MAP.get
+    
+    # Small words are only lowercased after the first word
+    first = words[0]
+    cased = get_cased(first.lower())
+    if cased is None or cased.islower():
+        cased = first[:1].upper() + first[1:]
+    
+    return ' '.join([cased] + [
+        get_cased(word.lower()) or word[:1].upper() + word[1:]
+        for word in words[1:]
+    ])
 
 class DJToolkit:
+    # Artist/title for every Mixxx track, loaded once for the renamer
+    MIXXX_METADATA_SQL = """
+        SELECT l.artist, l.title, tl.location
+        FROM library l
+        JOIN track_locations tl ON l.location = tl.id
+    """
+    
     def __init__(self):
         self.root = tk.Tk()
         self.root.title("DJ Harmonic Toolkit")
@@ -29,20 +294,37 @@ class DJToolkit:
         self.music_dir = Path("/home/tim/Music")
         self.scanner_db_path = Path.home() / ".music_scanner.db"
         self.audio_extensions = {'.mp3', '.flac', '.wav', '.m4a', '.aac', '.ogg', '.wma'}
+        self._last_ui = 0.0
+        
+        # Artist/title by Mixxx location, loaded on first use by get_metadata_from_mixxx
+        self._mixxx_cache = None
+        
+        # (artist, title) per (path, mtime), filled by library scans and mutagen reads; LRU-bounded
+        self._tag_cache = OrderedDict()
+        self._tag_lock = threading.Lock()
+        
+        # Worker threads never touch widgets; they queue updates for _drain_queue
+        self._ui_q = queue.Queue()
         
         # Initialize harmonic compatibility
         self.init_harmonic_compatibility()
+        if match_tracks is not None:
+            threading.Thread(target=warm_match_tracks, daemon=True).start()
         
-        # Initialize scanner database
+        # Initialize scanner database (kept open for the lifetime of the UI thread)
+        self.scan_conn = self.connect_scanner_db()
         self.init_scanner_db()
+        self.refresh_mixxx_shadow()
         
         # Setup UI
         self.setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after(UI_QUEUE_INTERVAL_MS, self._drain_queue)
     
     def init_harmonic_compatibility(self):
         """Initialize circle of fifths compatibility mapping"""
         # Traditional notation compatibility
-        self.harmonic_compatibility = {
+        compatibility = {
             # Major keys
             'C': ['C', 'F', 'G', 'Am', 'Dm', 'Em'],
             'C♯': ['C♯', 'F♯', 'G♯', 'A♯m', 'D♯m', 'E♯m'],
@@ -75,22 +357,23 @@ class DJToolkit:
             'Gm': ['Gm', 'Cm', 'Dm', 'B♭', 'E♭', 'F'],
             'G♯m': ['G♯m', 'C♯m', 'D♯m', 'B', 'E', 'F♯'],
         }
+        self.harmonic_compatibility = types.MappingProxyType({
+            key: frozenset(compatible) for key, compatible in compatibility.items()
+        })
         
         # Camelot wheel mapping (traditional to Camelot)
-        self.camelot_mapping = {
+        self.camelot_mapping = types.MappingProxyType({
             # Major keys (B side)
             'C': '8B', 'D♭': '3B', 'D': '10B', 'E♭': '5B', 'E': '12B', 'F': '7B',
             'F♯': '2B', 'G♭': '2B', 'G': '9B', 'A♭': '4B', 'A': '11B', 'B♭': '6B', 'B': '1B',
             # Minor keys (A side)
             'Am': '8A', 'B♭m': '3A', 'Bm': '10A', 'Cm': '5A', 'C♯m': '12A', 'Dm': '7A',
             'D♯m': '2A', 'E♭m': '2A', 'Em': '9A', 'Fm': '4A', 'F♯m': '11A', 'Gm': '6A', 'G♯m': '1A'
-        }
-        
-        # Reverse mapping (Camelot to traditional)
-        self.camelot_to_traditional = {v: k for k, v in self.camelot_mapping.items()}
+        })
         
-        # Add alternative notations
-        self.camelot_to_traditional.update({
+        # Reverse mapping (Camelot to traditional) plus alternative notations
+        self.camelot_to_traditional = types.MappingProxyType({
+            **{v: k for k, v in self.camelot_mapping.items()},
             '8B (C)': 'C', '3B (D♭)': 'D♭', '10B (D)': 'D', '5B (E♭)': 'E♭',
             '12B (E)': 'E', '7B (F)': 'F', '2B (F♯/G♭)': 'F♯', '9B (G)': 'G',
             '4B (A♭)': 'A♭', '11B (A)': 'A', '6B (B♭)': 'B♭', '1B (B)': 'B',
@@ -98,6 +381,12 @@ class DJToolkit:
             '12A (C♯m)': 'C♯m', '7A (Dm)': 'Dm', '2A (D♯m/E♭m)': 'D♯m', '9A (Em)': 'Em',
             '4A (Fm)': 'Fm', '11A (F♯m)': 'F♯m', '6A (Gm)': 'Gm', '1A (G♯m)': 'G♯m'
         })
+        
+        # Precompute the expanded compatible key set for every known key
+        self.full_compat = {
+            key: frozenset(self._compute_compatible(key))
+            for key in self.harmonic_compatibility
+        }
     
     def normalize_key(self, key):
         """Normalize key notation to traditional format"""
@@ -121,8 +410,15 @@ class DJToolkit:
         """Get all compatible keys including different notations"""
         normalized_key = self.normalize_key(input_key)
         if not normalized_key:
-            return []
+            return frozenset()
         
+        compatible = self.full_compat.get(normalized_key)
+        if compatible is None:
+            compatible = frozenset(self._compute_compatible(normalized_key))
+        return compatible
+    
+    def _compute_compatible(self, normalized_key):
+        """Expand a key's compatible keys into every supported notation"""
         # Get traditional compatible keys
         compatible_traditional = self.harmonic_compatibility.get(normalized_key, [normalized_key])
         
@@ -145,17 +441,85 @@ class DJToolkit:
                 all_compatible.add('F♯/G♭')
                 all_compatible.add('G♭')
         
-        return list(all_compatible)
+        return all_compatible
+    
+    def connect_scanner_db(self):
+        """Open a connection to the scanner database tuned for bulk writes"""
+        conn = sqlite3.connect(self.scanner_db_path, uri=True, cached_statements=256)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-65536")
+        return conn
     
     def init_scanner_db(self):
         """Initialize scanner database"""
-        conn = sqlite3.connect(self.scanner_db_path)
+        conn = self.scan_conn
         cursor = conn.cursor()
         
+        # Older databases keyed scanned_files on an AUTOINCREMENT id; rebuild them keyed on file_path
+        cursor.execute("PRAGMA table_info(scanned_files)")
+        if any(column[1] == 'id' for column in cursor.fetchall()):
+            with conn:
+                cursor.execute("BEGIN")
+                cursor.execute("ALTER TABLE scanned_files RENAME TO scanned_files_old")
+                self.create_scanned_files_table(cursor)
+                cursor.execute('''
+                    INSERT OR REPLACE INTO scanned_files
+                    SELECT file_path, file_hash, file_size, last_modified, bpm, key, duration,
+                           artist, title, album, genre, scan_date, in_mixxx
+                    FROM scanned_files_old
+                    WHERE file_path IS NOT NULL
+                ''')
+                cursor.execute("DROP TABLE scanned_files_old")
+        
+        self.create_scanned_files_table(cursor)
+        
         cursor.execute('''
-            CREATE TABLE IF NOT EXISTS scanned_files (
+            CREATE TABLE IF NOT EXISTS scan_sessions (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                file_path TEXT UNIQUE,
+                scan_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+                files_found INTEGER,
+                new_files INTEGER,
+                updated_files INTEGER,
+                scan_duration REAL
+            )
+        ''')
+        
+        # Local copy of the Mixxx library so we can index it without touching Mixxx's DB
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS mixxx_shadow (
+                artist TEXT,
+                title TEXT,
+                album TEXT,
+                bpm REAL,
+                key TEXT,
+                duration REAL,
+                location INTEGER
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_shadow_bpm_key ON mixxx_shadow (bpm, key)
+        ''')
+        
+        # ffprobe results by file content, so moved or renamed files skip the subprocess
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS probe_cache (
+                file_size INTEGER,
+                last_modified REAL,
+                file_hash TEXT,
+                analysis TEXT,
+                PRIMARY KEY (file_size, last_modified, file_hash)
+            )
+        ''')
+        
+        conn.commit()
+    
+    def create_scanned_files_table(self, cursor):
+        """Create scanned_files keyed directly on file_path"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS scanned_files (
+                file_path TEXT PRIMARY KEY,
                 file_hash TEXT,
                 file_size INTEGER,
                 last_modified REAL,
@@ -168,22 +532,61 @@ class DJToolkit:
                 genre TEXT,
                 scan_date DATETIME DEFAULT CURRENT_TIMESTAMP,
                 in_mixxx INTEGER DEFAULT 0
-            )
+            ) WITHOUT ROWID
         ''')
+    
+    def refresh_mixxx_shadow(self):
+        """Copy the live Mixxx library into the indexed shadow table"""
+        conn = self.scan_conn
+        if os.path.exists(self.mixxx_db_path):
+            try:
+                conn.execute(
+                    "ATTACH DATABASE ? AS mixxx",
+                    (Path(self.mixxx_db_path).absolute().as_uri() + "?mode=ro",)
+                )
+                try:
+                    with conn:
+                        conn.execute("DELETE FROM mixxx_shadow")
+                        conn.execute('''
+                            INSERT INTO mixxx_shadow (artist, title, album, bpm, key, duration, location)
+                            SELECT artist, title, album, bpm, key, duration, location
+                            FROM mixxx.library
+                            WHERE mixxx_deleted = 0
+                        ''')
+                finally:
+                    conn.execute("DETACH DATABASE mixxx")
+                
+            except Exception as e:
+                print(f"Error copying Mixxx library: {e}")
         
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS scan_sessions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                scan_date DATETIME DEFAULT CURRENT_TIMESTAMP,
-                files_found INTEGER,
-                new_files INTEGER,
-                updated_files INTEGER,
-                scan_duration REAL
-            )
-        ''')
+        self._load_library_arrays()
+    
+    def _load_library_arrays(self):
+        """Load the shadow library into NumPy arrays for vectorized ranking"""
+        self.library_rows = []
+        self.library_bpm = None
+        self.library_keys = []
+        self.library_key_codes = None
+        if np is None:
+            return
         
-        conn.commit()
-        conn.close()
+        self.library_rows = self.scan_conn.execute('''
+            SELECT artist, title, album, bpm, key, duration, location FROM mixxx_shadow
+        ''').fetchall()
+        
+        # Libraries repeat a handful of key spellings, so store each row's key as an index into them
+        key_codes = {}
+        for row in self.library_rows:
+            if row[4] not in key_codes:
+                key_codes[row[4]] = len(key_codes)
+        self.library_keys = list(key_codes)
+        
+        # float64 so BPM comparisons round exactly like SQLite's REAL
+        self.library_bpm = np.array(
+            [row[3] if row[3] is not None else np.nan for row in self.library_rows],
+            dtype=np.float64
+        )
+        self.library_key_codes = np.array([key_codes[row[4]] for row in self.library_rows], dtype=np.int32)
     
     def setup_ui(self):
         """Setup the main user interface"""
@@ -214,7 +617,7 @@ class DJToolkit:
         menubar.add_cascade(label="File", menu=file_menu)
         file_menu.add_command(label="Settings", command=self.show_settings)
         file_menu.add_separator()
-        file_menu.add_command(label="Exit", command=self.root.quit)
+        file_menu.add_command(label="Exit", command=self.on_close)
         
         # Tools menu
         tools_menu = tk.Menu(menubar, tearoff=0)
@@ -331,7 +734,7 @@ class DJToolkit:
         options_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
         
         self.use_metadata_var = tk.BooleanVar(value=True)
-        ttk.Checkbutton(options_frame, text="Use Mixxx metadata when available", 
+        ttk.Checkbutton(options_frame, text="Use Mixxx and file tag metadata when available", 
                        variable=self.use_metadata_var).pack(anchor=tk.W)
         
         # Preview frame
@@ -380,9 +783,8 @@ class DJToolkit:
             self.status_var.set("Searching for compatible tracks...")
             self.root.update()
             
-            # Clear previous results
-            for item in self.harmonic_tree.get_children():
-                self.harmonic_tree.delete(item)
+            # Clear previous results in a single Tcl call
+            self.harmonic_tree.delete(*self.harmonic_tree.get_children())
             
             # Get compatible tracks
             tracks = self.get_compatible_tracks(bpm, key)
@@ -391,29 +793,23 @@ class DJToolkit:
                 self.status_var.set("No compatible tracks found")
                 return
             
-            # Populate results
-            for track in tracks:
-                artist, title, album, track_bpm, track_key, duration, location = track
-                
-                # Determine compatibility level
-                normalized_current = self.normalize_key(key)
-                normalized_track = self.normalize_key(track_key)
-                
-                if normalized_track == normalized_current:
-                    compatibility = "Perfect"
-                elif normalized_track in self.get_all_compatible_keys(normalized_current):
-                    compatibility = "Good"
-                else:
-                    compatibility = "OK"
-                
-                self.harmonic_tree.insert('', tk.END, values=(
+            # Format all rows first so the insert loop is nothing but Tcl calls
+            rows = [
+                (
                     artist or "Unknown",
                     title or "Unknown",
                     f"{track_bpm:.1f}" if track_bpm else "?",
                     track_key or "?",
                     self.format_duration(duration),
                     compatibility
-                ))
+                )
+                for artist, title, album, track_bpm, track_key, duration, location, compatibility in tracks
+            ]
+            
+            # Populate results
+            insert = self.harmonic_tree.insert
+            for values in rows:
+                insert('', tk.END, values=values)
             
             self.status_var.set(f"Found {len(tracks)} compatible tracks")
             
@@ -428,11 +824,8 @@ class DJToolkit:
             return []
         
         try:
-            conn = sqlite3.connect(self.mixxx_db_path)
-            cursor = conn.cursor()
-            
             # Get all compatible keys (including different notations)
-            compatible_keys = self.get_all_compatible_keys(current_key)
+            compatible_keys = list(self.get_all_compatible_keys(current_key))
             
             if not compatible_keys:
                 compatible_keys = [current_key]
@@ -441,31 +834,81 @@ class DJToolkit:
             bpm_min = current_bpm - bpm_tolerance
             bpm_max = current_bpm + bpm_tolerance
             
+            # Classify compatibility once per key notation so SQLite can label each row
+            normalized_current = self.normalize_key(current_key)
+            compatible_normalized = self.get_all_compatible_keys(normalized_current)
+            perfect_keys = [k for k in compatible_keys if self.normalize_key(k) == normalized_current]
+            perfect_set = frozenset(perfect_keys)
+            good_keys = [k for k in compatible_keys
+                         if k not in perfect_set and self.normalize_key(k) in compatible_normalized]
+            
+            if self.library_bpm is not None:
+                return self.rank_compatible_tracks(current_bpm, current_key, bpm_min, bpm_max,
+                                                   compatible_keys, perfect_keys, good_keys)
+            
+            cursor = self.scan_conn.cursor()
+            
             placeholders = ','.join(['?' for _ in compatible_keys])
+            perfect_placeholders = ','.join(['?' for _ in perfect_keys])
+            good_placeholders = ','.join(['?' for _ in good_keys])
             query = f"""
-                SELECT artist, title, album, bpm, key, duration, location
-                FROM library 
+                SELECT artist, title, album, bpm, key, duration, location,
+                    CASE
+                        WHEN key IN ({perfect_placeholders}) THEN 'Perfect'
+                        WHEN key IN ({good_placeholders}) THEN 'Good'
+                        ELSE 'OK'
+                    END AS compatibility
+                FROM mixxx_shadow 
                 WHERE bpm BETWEEN ? AND ? 
                 AND key IN ({placeholders})
-                AND mixxx_deleted = 0
                 ORDER BY 
                     CASE WHEN key = ? THEN 0 ELSE 1 END,
                     ABS(bpm - ?) ASC
                 LIMIT 50
             """
             
-            params = [bpm_min, bpm_max] + compatible_keys + [current_key, current_bpm]
+            params = (perfect_keys + good_keys + [bpm_min, bpm_max] + compatible_keys
+                      + [current_key, current_bpm])
             cursor.execute(query, params)
             
-            results = cursor.fetchall()
-            conn.close()
-            
-            return results
+            return cursor.fetchall()
             
         except Exception as e:
             print(f"Database error: {e}")
             return []
     
+    def rank_compatible_tracks(self, current_bpm, current_key, bpm_min, bpm_max,
+                               compatible_keys, perfect_keys, good_keys, limit=50):
+        """Run get_compatible_tracks' query against the in-memory library arrays"""
+        # Per distinct key spelling: compatible or not, and the label the SQL CASE would give
+        compatible_set = frozenset(compatible_keys)
+        perfect_set = frozenset(perfect_keys)
+        good_set = frozenset(good_keys)
+        key_ok = np.array([key in compatible_set for key in self.library_keys], dtype=bool)
+        labels = [
+            'Perfect' if key in perfect_set else 'Good' if key in good_set else 'OK'
+            for key in self.library_keys
+        ]
+        
+        # WHERE bpm BETWEEN ? AND ? AND key IN (...); NaN (NULL) BPMs never match
+        if _KERNEL_READY.is_set():
+            mask = match_tracks(self.library_bpm, self.library_key_codes, key_ok, bpm_min, bpm_max)
+        else:
+            mask = ((self.library_bpm >= bpm_min) & (self.library_bpm <= bpm_max)
+                    & key_ok[self.library_key_codes])
+        matches = np.flatnonzero(mask)
+        
+        # ORDER BY exact key spelling first, then ABS(bpm - ?)
+        codes = self.library_key_codes[matches]
+        exact = np.array([key == current_key for key in self.library_keys], dtype=bool)[codes]
+        bpm_diff = np.abs(self.library_bpm[matches] - current_bpm)
+        order = np.lexsort((bpm_diff, ~exact))[:limit]
+        
+        return [
+            self.library_rows[i] + (labels[code],)
+            for i, code in zip(matches[order].tolist(), codes[order].tolist())
+        ]
+    
     def format_duration(self, seconds):
         """Convert seconds to MM:SS format"""
         if not seconds:
@@ -485,34 +928,46 @@ class DJToolkit:
     
     def start_library_scan(self):
         """Start library scanning in background thread"""
+        directory = Path(self.music_dir_var.get())
+        
         def scan_thread():
+            ui = self._ui_q
             try:
-                self.scan_results_text.delete(1.0, tk.END)
-                self.scan_results_text.insert(tk.END, "Starting library scan...\n")
+                ui.put(("clear_log",))
+                ui.put(("log", "Starting library scan...\n"))
                 
-                directory = Path(self.music_dir_var.get())
                 results = self.scan_music_library(directory)
                 
-                self.scan_results_text.insert(tk.END, f"\nScan Results:\n")
-                self.scan_results_text.insert(tk.END, f"Files processed: {results['files_found']}\n")
-                self.scan_results_text.insert(tk.END, f"New files: {results['new_files']}\n")
-                self.scan_results_text.insert(tk.END, f"Updated files: {results['updated_files']}\n")
-                self.scan_results_text.insert(tk.END, f"Duration: {results['scan_duration']:.2f} seconds\n")
+                report = (
+                    f"\nScan Results:\n"
+                    f"Files processed: {results['files_found']}\n"
+                    f"New files: {results['new_files']}\n"
+                    f"Updated files: {results['updated_files']}\n"
+                    f"Duration: {results['scan_duration']:.2f} seconds\n"
+                )
+                ui.put(("log", report))
                 
-                self.scan_progress_var.set("Scan complete!")
+                ui.put(("scan_status", "Scan complete!"))
                 
             except Exception as e:
-                self.scan_results_text.insert(tk.END, f"Error during scan: {e}\n")
-                self.scan_progress_var.set("Scan failed!")
+                ui.put(("log", f"Error during scan: {e}\n"))
+                ui.put(("scan_status", "Scan failed!"))
         
         threading.Thread(target=scan_thread, daemon=True).start()
     
     def scan_progress_callback(self, current, total, filename):
-        """Progress callback for scanning"""
+        """Progress callback for scanning, throttled and queued for the Tk thread"""
+        now = time.monotonic()
+        if now - self._last_ui < PROGRESS_INTERVAL and current != total:
+            return
+        self._last_ui = now
+        self._ui_q.put(("progress", current, total, filename))
+    
+    def _apply_progress(self, current, total, filename):
+        """Show scan progress (runs on the Tk thread)"""
         progress = (current / total) * 100
         self.scan_progress_bar['value'] = progress
         self.scan_progress_var.set(f"Processing {current}/{total}: {Path(filename).name}")
-        self.root.update()
     
     def scan_music_library(self, directory):
         """Scan music library for new files"""
@@ -522,62 +977,66 @@ class DJToolkit:
         updated_files = 0
         
         # Get all audio files recursively
-        audio_files = []
-        for ext in self.audio_extensions:
-            audio_files.extend(directory.rglob(f"*{ext}"))
-            audio_files.extend(directory.rglob(f"*{ext.upper()}"))
+        audio_files = list(self.iter_audio_files(directory))
         
         total_files = len(audio_files)
         
-        conn = sqlite3.connect(self.scanner_db_path)
+        # SQLite connections can't be shared across threads, so the scan uses its own
+        conn = self.connect_scanner_db()
         cursor = conn.cursor()
         
-        for i, file_path in enumerate(audio_files):
-            self.scan_progress_callback(i + 1, total_files, str(file_path))
+        # Load known files once instead of querying per file
+        cursor.execute("SELECT file_path, file_size, last_modified FROM scanned_files")
+        existing_map = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+        
+        cursor.execute("SELECT file_size, last_modified, file_hash, analysis FROM probe_cache")
+        probe_cache = {row[:3]: row[3] for row in cursor.fetchall()}
+        
+        pending = []
+        probe_pending = []
+        
+        # ffprobe runs in a subprocess, so threads overlap the per-file work
+        with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as executor:
+            def completed():
+                # Keep at most SCAN_QUEUE_SIZE files in flight, yielding each as it finishes
+                in_flight = {}
+                for entry in audio_files:
+                    if len(in_flight) >= SCAN_QUEUE_SIZE:
+                        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            yield future, in_flight.pop(future)
+                    future = executor.submit(self.process_audio_file, entry, existing_map, probe_cache)
+                    in_flight[future] = entry.path
+                for future in as_completed(in_flight):
+                    yield future, in_flight[future]
             
-            try:
-                # Get file stats
-                stat = file_path.stat()
-                file_size = stat.st_size
-                last_modified = stat.st_mtime
-                file_hash = self.get_file_hash(file_path)
+            for i, (future, file_path) in enumerate(completed()):
+                self.scan_progress_callback(i + 1, total_files, file_path)
                 
-                # Check if file exists in our database
-                cursor.execute(
-                    "SELECT file_hash, last_modified FROM scanned_files WHERE file_path = ?",
-                    (str(file_path),)
-                )
-                existing = cursor.fetchone()
+                try:
+                    status, row, probe_row = future.result()
+                except Exception as e:
+                    print(f"Error processing {file_path}: {e}")
+                    continue
                 
-                needs_analysis = False
-                if not existing:
+                if status == 'new':
                     new_files += 1
-                    needs_analysis = True
-                elif existing[0] != file_hash or existing[1] != last_modified:
+                elif status == 'updated':
                     updated_files += 1
-                    needs_analysis = True
                 
-                if needs_analysis:
-                    analysis = self.analyze_audio_file(file_path)
-                    
-                    if analysis:
-                        cursor.execute('''
-                            INSERT OR REPLACE INTO scanned_files 
-                            (file_path, file_hash, file_size, last_modified, 
-                             bpm, key, duration, artist, title, album, genre)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        ''', (
-                            str(file_path), file_hash, file_size, last_modified,
-                            analysis['bpm'], analysis['key'], analysis['duration'],
-                            analysis['artist'], analysis['title'], analysis['album'],
-                            analysis['genre']
-                        ))
+                if probe_row:
+                    probe_pending.append(probe_row)
                 
-                files_found += 1
+                if row:
+                    self._remember_tags((row[0], row[3]), (row[7], row[8]))
+                    pending.append(row)
+                    if len(pending) >= SCAN_BATCH_SIZE:
+                        self.flush_scanned_files(conn, pending, probe_pending)
                 
-            except Exception as e:
-                print(f"Error processing {file_path}: {e}")
-                continue
+                files_found += 1
+        
+        self.flush_scanned_files(conn, pending, probe_pending)
+        self.prune_probe_cache(conn, directory, audio_files, probe_cache)
         
         # Record scan session
         scan_duration = time.time() - start_time
@@ -596,41 +1055,162 @@ class DJToolkit:
             'scan_duration': scan_duration
         }
     
+    def iter_audio_files(self, directory):
+        """Yield a DirEntry for every audio file below directory in a single walk"""
+        stack = [directory]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif (entry.is_file() and
+                              os.path.splitext(entry.name)[1].lower() in self.audio_extensions):
+                            yield entry
+            except OSError as e:
+                print(f"Error reading {current}: {e}")
+    
+    def process_audio_file(self, entry, existing_map, probe_cache):
+        """Check a single file against the known files and analyze it if changed
+        
+        Runs in a worker thread, so it must not touch the database or UI.
+        Returns (status, row, probe_row) where status is 'new', 'updated' or None
+        and probe_row is a new probe_cache entry, if ffprobe had to be run.
+        """
+        file_path = Path(entry.path)
+        
+        # Get file stats (cached on the DirEntry)
+        stat = entry.stat()
+        file_size = stat.st_size
+        last_modified = stat.st_mtime
+        
+        # Unchanged size and mtime means the file is up to date, skip hashing
+        existing = existing_map.get(str(file_path))
+        
+        if not existing:
+            status = 'new'
+        elif existing[0] != file_size or existing[1] != last_modified:
+            status = 'updated'
+        else:
+            return None, None, None
+        
+        file_hash = self.get_file_hash(file_path)
+        
+        # Reuse a previous ffprobe result for identical content
+        probe_row = None
+        cached = probe_cache.get((file_size, last_modified, file_hash))
+        if cached is not None:
+            analysis = json.loads(cached)
+        else:
+            analysis = self.analyze_audio_file(file_path)
+            if analysis and file_hash:
+                probe_row = (file_size, last_modified, file_hash, json.dumps(analysis))
+        
+        if not analysis:
+            return status, None, None
+        
+        return status, (
+            str(file_path), file_hash, file_size, last_modified,
+            analysis['bpm'], analysis['key'], analysis['duration'],
+            analysis['artist'], analysis['title'], analysis['album'],
+            analysis['genre']
+        ), probe_row
+    
+    def flush_scanned_files(self, conn, pending, probe_pending):
+        """Write buffered scan rows and probe results in a single transaction"""
+        if not pending and not probe_pending:
+            return
+        conn.executemany('''
+            INSERT OR REPLACE INTO scanned_files 
+            (file_path, file_hash, file_size, last_modified, 
+             bpm, key, duration, artist, title, album, genre)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', pending)
+        conn.executemany('''
+            INSERT OR REPLACE INTO probe_cache (file_size, last_modified, file_hash, analysis)
+            VALUES (?, ?, ?, ?)
+        ''', probe_pending)
+        conn.commit()
+        pending.clear()
+        probe_pending.clear()
+    
+    def prune_probe_cache(self, conn, directory, audio_files, probe_cache):
+        """Delete probe results that no file seen in this scan, or kept from other directories, still matches"""
+        seen = {str(Path(entry.path)) for entry in audio_files}
+        prefix = os.path.join(str(directory), '')
+        
+        live = set()
+        for file_path, file_size, last_modified, file_hash in conn.execute(
+            "SELECT file_path, file_size, last_modified, file_hash FROM scanned_files"
+        ):
+            if file_path in seen or not file_path.startswith(prefix):
+                live.add((file_size, last_modified, file_hash))
+        
+        conn.executemany(
+            "DELETE FROM probe_cache WHERE file_size = ? AND last_modified = ? AND file_hash = ?",
+            [key for key in probe_cache if key not in live]
+        )
+        conn.commit()
+    
     def get_file_hash(self, file_path):
-        """Generate MD5 hash of file for change detection"""
-        hash_md5 = hashlib.md5()
+        """Generate a fast non-cryptographic fingerprint of file for change detection"""
+        # xxh3 when available, otherwise blake2b which still beats MD5
+        if xxhash is not None:
+            file_hash = xxhash.xxh3_128()
+        else:
+            file_hash = hashlib.blake2b(digest_size=16)
         try:
             with open(file_path, "rb") as f:
-                # Read first and last 64KB for speed
-                hash_md5.update(f.read(65536))
-                f.seek(-65536, 2)
-                hash_md5.update(f.read(65536))
-            return hash_md5.hexdigest()
-        except:
+                size = os.fstat(f.fileno()).st_size
+                if size == 0:
+                    return file_hash.hexdigest()
+                
+                try:
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except (OSError, ValueError):
+                    # Mounts without mmap support (some FUSE/network filesystems) read the same bytes
+                    if size <= 2 * HASH_SAMPLE_SIZE:
+                        file_hash.update(f.read())
+                    else:
+                        file_hash.update(f.read(HASH_SAMPLE_SIZE))
+                        f.seek(-HASH_SAMPLE_SIZE, 2)
+                        file_hash.update(f.read(HASH_SAMPLE_SIZE))
+                    return file_hash.hexdigest()
+                
+                # Hash first and last 64KB straight out of the mapping for speed
+                with mm, memoryview(mm) as view:
+                    if size <= 2 * HASH_SAMPLE_SIZE:
+                        file_hash.update(view)
+                    else:
+                        file_hash.update(view[:HASH_SAMPLE_SIZE])
+                        file_hash.update(view[-HASH_SAMPLE_SIZE:])
+            return file_hash.hexdigest()
+        except OSError:
             return None
     
     def analyze_audio_file(self, file_path):
         """Analyze audio file using ffprobe for metadata"""
         try:
+            # Only ask for the fields we use; JSON keeps multi-line tag values intact
             cmd = [
-                'ffprobe', '-v', 'quiet', '-print_format', 'json',
-                '-show_format', '-show_streams', str(file_path)
+                'ffprobe', '-v', 'quiet',
+                '-show_entries', 'format=duration:format_tags=artist,title,album,genre,albumartist',
+                '-of', 'json', str(file_path)
             ]
             
             result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
             if result.returncode != 0:
                 return None
             
-            data = json.loads(result.stdout)
-            format_info = data.get('format', {})
-            tags = format_info.get('tags', {})
+            format_info = json.loads(result.stdout).get('format', {})
             
-            # Extract metadata (case-insensitive)
-            def get_tag(tag_name):
-                for key, value in tags.items():
-                    if key.lower() == tag_name.lower():
-                        return value
-                return None
+            # Tag names are matched case-insensitively, first spelling wins
+            tags = {}
+            for key, value in format_info.get('tags', {}).items():
+                tags.setdefault(key.lower(), value)
+            
+            get_tag = tags.get
             
             return {
                 'duration': float(format_info.get('duration', 0)),
@@ -656,19 +1236,20 @@ class DJToolkit:
     
     def preview_renames(self):
         """Preview file renames"""
+        directory = Path(self.rename_dir_var.get())
+        use_metadata = self.use_metadata_var.get()
+        self.status_var.set("Analyzing files for rename...")
+        
         def preview_thread():
+            ui = self._ui_q
             try:
-                self.status_var.set("Analyzing files for rename...")
-                self.root.update()
-                
-                directory = Path(self.rename_dir_var.get())
-                self.renames = self.get_rename_preview(directory)
+                self.renames = self.get_rename_preview(directory, use_metadata)
                 
                 # Clear previous results
-                for item in self.rename_tree.get_children():
-                    self.rename_tree.delete(item)
+                ui.put(("tree_clear",))
                 
                 # Populate results
+                rows = []
                 for rename_info in self.renames:
                     original = rename_info['original_name']
                     new_name = rename_info['new_name']
@@ -678,35 +1259,41 @@ class DJToolkit:
                     if rename_info['new_path'].exists():
                         status = "Conflict"
                     
-                    self.rename_tree.insert('', tk.END, values=(original, new_name, status))
+                    rows.append((original, new_name, status))
+                ui.put(("tree_rows", rows))
                 
-                self.status_var.set(f"Found {len(self.renames)} files to rename")
+                ui.put(("status", f"Found {len(self.renames)} files to rename"))
                 
             except Exception as e:
-                messagebox.showerror("Error", f"Error during preview: {str(e)}")
-                self.status_var.set("Preview failed")
+                ui.put(("error", f"Error during preview: {str(e)}"))
+                ui.put(("status", "Preview failed"))
         
         threading.Thread(target=preview_thread, daemon=True).start()
     
-    def get_rename_preview(self, directory):
+    def get_rename_preview(self, directory, use_metadata=True):
         """Get preview of what files would be renamed"""
         renames = []
         
-        for file_path in directory.rglob("*"):
-            if file_path.is_file() and file_path.suffix.lower() in self.audio_extensions:
-                new_name = self.generate_clean_filename(file_path)
-                
-                if new_name != file_path.name:
-                    renames.append({
-                        'original_path': file_path,
-                        'original_name': file_path.name,
-                        'new_name': new_name,
-                        'new_path': file_path.parent / new_name
-                    })
+        paths = [Path(entry.path) for entry in self.iter_audio_files(directory)]
+        new_names = self.clean_filename_batch(paths, use_metadata)
+        
+        for file_path, new_name in zip(paths, new_names):
+            if new_name != file_path.name:
+                renames.append({
+                    'original_path': file_path,
+                    'original_name': file_path.name,
+                    'new_name': new_name,
+                    'new_path': file_path.parent / new_name
+                })
         
         return renames
     
-    def generate_clean_filename(self, file_path):
+    def clean_filename_batch(self, paths, use_metadata=True):
+        """Generate clean filenames for a list of files"""
+        generate = self.generate_clean_filename
+        return [generate(file_path, use_metadata) for file_path in paths]
+    
+    def generate_clean_filename(self, file_path, use_metadata=True):
         """Generate a clean filename for the given file"""
         original_name = file_path.stem
         extension = file_path.suffix
@@ -714,8 +1301,14 @@ class DJToolkit:
         artist, title = None, None
         
         # Try to get metadata from Mixxx first
-        if self.use_metadata_var.get():
-            artist, title = self.get_metadata_from_mixxx(file_path)
+        if use_metadata:
+            artist, title = map(clean_tag_value, self.get_metadata_from_mixxx(file_path))
+        
+        # Then the file's own tags
+        if use_metadata and (not artist or not title):
+            tag_artist, tag_title = map(clean_tag_value, self.get_file_tags(file_path))
+            artist = artist or tag_artist
+            title = title or tag_title
         
         # If no metadata, extract from filename
         if not artist or not title:
@@ -729,10 +1322,10 @@ class DJToolkit:
         elif title:
             clean_name = title
         else:
-            clean_name = self.clean_filename_part(original_name)
+            clean_name = clean_filename_part(original_name)
         
         # Remove invalid filename characters
-        clean_name = re.sub(r'[<>:"/\\|?*]', '', clean_name)
+        clean_name = clean_name.translate(_INVALID_FILENAME_CHARS)
         clean_name = clean_name.strip()
         
         return clean_name + extension
@@ -743,107 +1336,94 @@ class DJToolkit:
             return None, None
         
         try:
-            conn = sqlite3.connect(self.mixxx_db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT l.artist, l.title 
-                FROM library l
-                JOIN track_locations tl ON l.location = tl.id
-                WHERE tl.location LIKE ?
-            """, (f"%{file_path.name}%",))
-            
-            result = cursor.fetchone()
-            conn.close()
+            # Local reference, so a refresh on the Tk thread can't drop it mid-lookup
+            cache = self._mixxx_cache
+            if cache is None:
+                # Keyed by exact absolute location, plus lowercased basename (first row wins)
+                # for libraries stored on another mount or with different casing
+                cache = {}
+                conn = sqlite3.connect(
+                    Path(self.mixxx_db_path).absolute().as_uri() + "?mode=ro", uri=True
+                )
+                try:
+                    for artist, title, location in conn.execute(self.MIXXX_METADATA_SQL):
+                        if location:
+                            cache[location] = (artist, title)
+                            cache.setdefault(os.path.basename(location).lower(), (artist, title))
+                finally:
+                    conn.close()
+                self._mixxx_cache = cache
             
-            if result:
-                return result[0], result[1]
+            result = cache.get(str(file_path.absolute()))
+            if result is None:
+                result = cache.get(file_path.name.lower(), (None, None))
+            return result
             
         except Exception as e:
             print(f"Error querying Mixxx database: {e}")
         
         return None, None
     
-    def extract_artist_title(self, filename_without_ext):
-        """Try to extract artist and title from filename"""
-        cleaned = self.clean_filename_part(filename_without_ext)
+    def get_file_tags(self, file_path):
+        """Get (artist, title) from the file's tags, cached per path and mtime"""
+        try:
+            key = (str(file_path), os.stat(file_path).st_mtime)
+        except OSError:
+            return None, None
         
-        # Artist extraction patterns
-        artist_patterns = [
-            r'^(.+?)\s*[-–—]\s*(.+)$',  # "Artist - Title"
-            r'^(.+?)_-_(.+)$',          # "Artist_-_Title"
-            r'^(.+?)\s+by\s+(.+)$',     # "Artist by Title"
-        ]
+        with self._tag_lock:
+            tags = self._tag_cache.get(key)
+            if tags is not None:
+                self._tag_cache.move_to_end(key)
+                return tags
         
-        # Try each pattern
-        for pattern in artist_patterns:
-            match = re.match(pattern, cleaned)
-            if match:
-                part1, part2 = match.groups()
-                part1 = self.clean_filename_part(part1)
-                part2 = self.clean_filename_part(part2)
+        tags = (None, None)
+        if mutagen is not None:
+            try:
+                audio = mutagen.File(key[0], easy=True)
+                if audio is not None and audio.tags is not None:
+                    # Same artist fallback as analyze_audio_file, so both sources name a file alike
+                    get_tag = audio.tags.get
+                    artist = get_tag('artist', [None])[0] or get_tag('albumartist', [None])[0]
+                    tags = (artist, get_tag('title', [None])[0])
+            except Exception as e:
+                print(f"Error reading tags from {key[0]}: {e}")
+        self._remember_tags(key, tags)
+        return tags
+    
+    def _remember_tags(self, key, tags):
+        """Store tags under (path, mtime), evicting the least recently used entry when full"""
+        with self._tag_lock:
+            self._tag_cache[key] = tags
+            self._tag_cache.move_to_end(key)
+            if len(self._tag_cache) > TAG_CACHE_SIZE:
+                self._tag_cache.popitem(last=False)
+    
+    def clear_tag_cache(self):
+        """Forget all cached file tags"""
+        with self._tag_lock:
+            self._tag_cache.clear()
+    
+    def extract_artist_title(self, filename_without_ext):
+        """Try to extract artist and title from filename"""
+        cleaned = clean_filename_part(filename_without_ext)
+        
+        # Cleaning leaves single spaces around every dash, so plain string splits suffice
+        for separator in _ARTIST_SEPARATORS:
+            part1, sep, part2 = cleaned.partition(separator)
+            if sep and part1 and part2:
+                part1 = clean_filename_part(part1)
+                part2 = clean_filename_part(part2)
                 
-                # Heuristic: shorter part is usually artist (unless very short)
-                if len(part1) < len(part2) and len(part1) > 2:
-                    return part1, part2  # artist, title
-                elif len(part2) < len(part1) and len(part2) > 2:
+                # Heuristic: shorter part is usually artist (unless very short),
+                # otherwise assume first is artist
+                if 2 < len(part2) < len(part1):
                     return part2, part1  # artist, title
-                else:
-                    return part1, part2  # assume first is artist
+                return part1, part2  # artist, title
         
-        # If no pattern matches, return cleaned filename as title
+        # If no separator matches, return cleaned filename as title
         return "", cleaned
     
-    def clean_filename_part(self, text):
-        """Clean up a filename part (artist or title)"""
-        if not text:
-            return ""
-        
-        # Common patterns to clean up
-        cleanup_patterns = [
-            (r'^(\d{1,3}[\.\-_\s]*)', ''),  # Remove track numbers
-            (r'^(track[\s\-_]*\d*[\s\-_]*)', '', re.IGNORECASE),  # Remove "track"
-            (r'[_]+', ' '),  # Replace underscores with spaces
-            (r'\s+', ' '),   # Multiple spaces to single
-            (r'\s*[\(\[]*(320|128|192|256|kbps|mp3|flac|wav|official|audio|hq|hd)[\)\]]*\s*', '', re.IGNORECASE),
-            (r'\s*[-_]+\s*', ' - '),  # Clean separators
-            (r'\s*[–—]\s*', ' - '),   # Unicode dashes
-            (r'^[\s\-_]+|[\s\-_]+$', ''),  # Trim
-        ]
-        
-        # Apply cleanup patterns
-        for pattern, replacement, *flags in cleanup_patterns:
-            flag = flags[0] if flags else 0
-            text = re.sub(pattern, replacement, text, flags=flag)
-        
-        # Smart capitalization
-        return self.smart_capitalize(text.strip())
-    
-    def smart_capitalize(self, text):
-        """Smart capitalization for music titles"""
-        if not text:
-            return ""
-        
-        lowercase_words = {'a', 'an', 'and', 'as', 'at', 'but', 'by', 'for', 'if', 
-                          'in', 'of', 'on', 'or', 'the', 'to', 'up', 'vs', 'with'}
-        uppercase_words = {'dj', 'mc', 'uk', 'usa', 'nyc', 'la', 'sf', 'tv', 'fm', 'am'}
-        
-        words = text.split()
-        result = []
-        
-        for i, word in enumerate(words):
-            word_lower = word.lower()
-            
-            if word_lower in uppercase_words:
-                result.append(word.upper())
-            elif i > 0 and word_lower in lowercase_words:
-                result.append(word_lower)
-            else:
-                if word:
-                    result.append(word[0].upper() + word[1:])
-        
-        return ' '.join(result)
-    
     def apply_renames(self):
         """Apply the file renames"""
         if not hasattr(self, 'renames') or not self.renames:
@@ -859,60 +1439,194 @@ class DJToolkit:
         if not result:
             return
         
+        # Fetch the row ids once, on the Tk thread
+        tree_items = self.rename_tree.get_children()
+        
+        self.status_var.set("Renaming files...")
+        
         def rename_thread():
+            ui = self._ui_q
             try:
-                self.status_var.set("Renaming files...")
                 success_count = 0
                 error_count = 0
+                statuses = []
+                
+                def post_statuses():
+                    # Tree updates happen on the Tk thread, one message per batch
+                    if statuses:
+                        ui.put(("rename_statuses", statuses.copy()))
+                        statuses.clear()
                 
-                for i, rename_info in enumerate(self.renames):
-                    try:
-                        original_path = rename_info['original_path']
-                        new_path = rename_info['new_path']
-                        
-                        # Check if target already exists
-                        if new_path.exists():
-                            error_count += 1
-                            item = self.rename_tree.get_children()[i]
-                            self.rename_tree.set(item, 'Status', 'Conflict')
-                            continue
-                        
-                        # Rename the file
-                        original_path.rename(new_path)
+                pairs = [(rename_info['original_path'], rename_info['new_path']) for rename_info in self.renames]
+                for i, status in self.rename_files(pairs):
+                    if status == 'Renamed':
                         success_count += 1
-                        
-                        # Update tree
-                        item = self.rename_tree.get_children()[i]
-                        self.rename_tree.set(item, 'Status', 'Renamed')
-                        
-                    except Exception as e:
+                    else:
                         error_count += 1
-                        item = self.rename_tree.get_children()[i]
-                        self.rename_tree.set(item, 'Status', 'Failed')
+                    
+                    statuses.append((tree_items[i], status))
+                    if len(statuses) >= RENAME_STATUS_BATCH:
+                        post_statuses()
+                
+                post_statuses()
+                
+                # Renamed files left their old paths behind as dead keys
+                self.clear_tag_cache()
                 
                 message = f"Renamed {success_count} files"
                 if error_count > 0:
                     message += f", {error_count} errors"
                 
-                self.status_var.set(message)
-                messagebox.showinfo("Complete", message)
+                ui.put(("status", message))
+                ui.put(("info", "Complete", message))
                 
             except Exception as e:
-                messagebox.showerror("Error", f"Error during rename: {str(e)}")
-                self.status_var.set("Rename failed")
+                ui.put(("error", f"Error during rename: {str(e)}"))
+                ui.put(("status", "Rename failed"))
         
         threading.Thread(target=rename_thread, daemon=True).start()
     
+    def rename_files(self, pairs):
+        """Rename (source, target) pairs without overwriting, yielding (index, status) as each finishes"""
+        def status_of(error):
+            if error is None:
+                return 'Renamed'
+            if isinstance(error, FileExistsError):
+                return 'Conflict'
+            return 'Failed'
+        
+        # Existing targets surface as FileExistsError; a name claimed by an earlier rename is a conflict too
+        jobs = {}
+        claimed = set()
+        for i, (src, dst) in enumerate(pairs):
+            dst = str(dst)
+            if dst in claimed:
+                yield i, 'Conflict'
+                continue
+            claimed.add(dst)
+            jobs[i] = (str(src), dst)
+        
+        # A rename onto another file's current name waits for that file to move first;
+        # targets are unique, so each job has at most one waiter and chains can't branch
+        holders = {src: i for i, (src, dst) in jobs.items()}
+        waiter = {holders[dst]: i for i, (src, dst) in jobs.items() if dst in holders}
+        blocked = set(waiter.values())
+        
+        with ThreadPoolExecutor(max_workers=RENAME_WORKERS) as executor:
+            futures = {
+                executor.submit(self._rename_no_clobber, *jobs[i]): i
+                for i in jobs if i not in blocked
+            }
+            heads = []
+            for future in as_completed(futures):
+                i = futures[future]
+                heads.append(i)
+                yield i, status_of(future.exception())
+        
+        # Walk each chain back from its free end, so every target's holder has already moved
+        for i in heads:
+            i = waiter.get(i)
+            while i is not None:
+                blocked.discard(i)
+                try:
+                    self._rename_no_clobber(*jobs[i])
+                    error = None
+                except Exception as e:
+                    error = e
+                yield i, status_of(error)
+                i = waiter.get(i)
+        
+        # Whatever is still blocked sits on a cycle (A -> B -> A) and can't move without a temporary name
+        for i in sorted(blocked):
+            yield i, 'Conflict'
+    
+    def _rename_no_clobber(self, src, dst):
+        """Rename src to dst, raising FileExistsError instead of overwriting dst"""
+        if os.name == 'nt':
+            os.rename(src, dst)  # Already refuses to overwrite on Windows
+            return
+        
+        try:
+            os.link(src, dst, follow_symlinks=False)
+        except FileExistsError:
+            raise
+        except OSError:
+            # Filesystems without hard links (FAT/exFAT drives) need a check first
+            if os.path.lexists(dst):
+                raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), dst)
+            os.rename(src, dst)
+            return
+        
+        try:
+            os.unlink(src)
+        except OSError:
+            os.unlink(dst)
+            raise
+    
+    def _apply_rename_statuses(self, statuses):
+        """Set the Status column of rename preview rows (runs on the Tk thread)"""
+        set_value = self.rename_tree.set
+        for item, status in statuses:
+            set_value(item, 'Status', status)
+    
     def clear_rename_preview(self):
         """Clear rename preview"""
-        for item in self.rename_tree.get_children():
-            self.rename_tree.delete(item)
+        self.rename_tree.delete(*self.rename_tree.get_children())
         if hasattr(self, 'renames'):
             self.renames = []
         self.status_var.set("Preview cleared")
     
     # ===== UTILITY METHODS =====
     
+    def _drain_queue(self):
+        """Apply widget updates queued by worker threads (runs on the Tk thread)"""
+        log_parts = []
+        tree_rows = []
+        
+        def flush():
+            if log_parts:
+                self.scan_results_text.insert(tk.END, ''.join(log_parts))
+                log_parts.clear()
+            insert = self.rename_tree.insert
+            for values in tree_rows:
+                insert('', tk.END, values=values)
+            tree_rows.clear()
+        
+        try:
+            for _ in range(UI_QUEUE_BATCH):
+                kind, *args = self._ui_q.get_nowait()
+                
+                # Batch runs of log lines and tree rows into single passes
+                if kind == 'log':
+                    log_parts.append(args[0])
+                    continue
+                if kind == 'tree_rows':
+                    tree_rows.extend(args[0])
+                    continue
+                
+                flush()
+                if kind == 'clear_log':
+                    self.scan_results_text.delete(1.0, tk.END)
+                elif kind == 'scan_status':
+                    self.scan_progress_var.set(args[0])
+                elif kind == 'tree_clear':
+                    self.rename_tree.delete(*self.rename_tree.get_children())
+                elif kind == 'progress':
+                    self._apply_progress(*args)
+                elif kind == 'rename_statuses':
+                    self._apply_rename_statuses(args[0])
+                elif kind == 'status':
+                    self.status_var.set(args[0])
+                elif kind == 'info':
+                    messagebox.showinfo(*args)
+                elif kind == 'error':
+                    messagebox.showerror("Error", args[0])
+        except queue.Empty:
+            pass
+        finally:
+            flush()
+            self.root.after(UI_QUEUE_INTERVAL_MS, self._drain_queue)
+    
     def quick_scan(self):
         """Quick scan of music library"""
         self.notebook.select(1)  # Switch to scanner tab
@@ -920,6 +1634,9 @@ class DJToolkit:
     
     def refresh_mixxx_db(self):
         """Refresh Mixxx database connection"""
+        self._mixxx_cache = None
+        self.clear_tag_cache()
+        self.refresh_mixxx_shadow()
         self.status_var.set("Mixxx database connection refreshed")
         messagebox.showinfo("Info", "Database connection refreshed. New tracks should now appear in searches.")
     
@@ -942,6 +1659,11 @@ Created for the DJ community."""
         
         messagebox.showinfo("About DJ Harmonic Toolkit", about_text)
     
+    def on_close(self):
+        """Close database connections and exit"""
+        self.scan_conn.close()
+        self.root.destroy()
+    
     def run(self):
         """Run the application"""
         self.root.mainloop()
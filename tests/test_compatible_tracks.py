@@ -0,0 +1,75 @@
+"""The NumPy ranking path must return exactly what the SQL query returns"""
+
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dj_toolkit
+from dj_toolkit import DJToolkit
+
+
+@unittest.skipIf(dj_toolkit.np is None, "NumPy is not installed")
+class CompatibleTracksTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        
+        # Build the app without Tk; only the database side is exercised
+        self.app = DJToolkit.__new__(DJToolkit)
+        self.app.mixxx_db_path = os.path.join(self.tmp.name, "mixxxdb.sqlite")
+        open(self.app.mixxx_db_path, "w").close()
+        self.app.scanner_db_path = os.path.join(self.tmp.name, "scanner.db")
+        self.app.init_harmonic_compatibility()
+        self.app.scan_conn = self.app.connect_scanner_db()
+        self.addCleanup(self.app.scan_conn.close)
+        self.app.init_scanner_db()
+        
+        # Every notation the app knows plus some it doesn't, with unique BPMs so order is total
+        rng = random.Random(1234)
+        self.keys = sorted(set(self.app.harmonic_compatibility) | set(self.app.camelot_to_traditional)
+                           | {'D♯m/E♭m', 'F♯/G♭', 'G♭', 'E♭m', 'X', ''})
+        bpms = rng.sample(range(11000, 14000), 3000)
+        rows = [
+            (f"Artist {i}", f"Title {i}", "Album",
+             None if i % 97 == 0 else bpm / 100 + rng.random() / 1000,
+             None if i % 89 == 0 else rng.choice(self.keys), 300.0, i)
+            for i, bpm in enumerate(bpms)
+        ]
+        self.app.scan_conn.executemany('''
+            INSERT INTO mixxx_shadow (artist, title, album, bpm, key, duration, location)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        self.app.scan_conn.commit()
+        self.rng = rng
+    
+    def query_both(self, bpm, key):
+        self.app._load_library_arrays()
+        ranked = self.app.get_compatible_tracks(bpm, key)
+        self.app.library_bpm = None
+        return ranked, self.app.get_compatible_tracks(bpm, key)
+    
+    def test_numpy_path_matches_sql(self):
+        for key in self.keys:
+            for bpm in (self.rng.uniform(112, 138), 120.0, 125.5):
+                with self.subTest(key=key, bpm=bpm):
+                    ranked, expected = self.query_both(bpm, key)
+                    self.assertEqual(ranked, expected)
+    
+    @unittest.skipIf(dj_toolkit.match_tracks is None, "numba is not installed")
+    def test_numba_kernel_matches_sql(self):
+        dj_toolkit.warm_match_tracks()
+        self.assertTrue(dj_toolkit._KERNEL_READY.is_set())
+        self.test_numpy_path_matches_sql()
+    
+    def test_enharmonic_neighbours(self):
+        ranked, expected = self.query_both(125.0, 'C♯')
+        self.assertEqual(ranked, expected)
+        self.assertTrue({row[4] for row in ranked} - {'C♯', 'D♭', '3B'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+"""Filename cleanup must give the same result whichever optional matcher backends are installed"""
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dj_toolkit
+from dj_toolkit import DJToolkit
+
+# (filename part, clean_filename_part result, extract_artist_title result), as produced by the
+# original regex-only pipeline
+CASES = [
+    ('mp320', '20', ('', '20')),
+    ('Artist - Song mp320', 'Artist - Song20', ('Artist', 'Song20')),
+    ('(( mp3', '((', ('', '((')),
+    ('Song (( mp3 ))', 'Song (())', ('', 'Song (())')),
+    ('a\x1cb', 'A B', ('', 'A B')),
+    ('\x1c mp3 \x1c', '', ('', '')),
+    ('01 track 02', '', ('', '')),
+    ('03 - Track Name', 'Name', ('', 'Name')),
+    ('12track_list', 'List', ('', 'List')),
+    ('07. trackless - wonder', 'Less - Wonder', ('Less', 'Wonder')),
+    ('Artist – Title', 'Artist - Title', ('Title', 'Artist')),
+    ('Artist — Title (Official Audio)', 'Artist - Title', ('Title', 'Artist')),
+    ('Ärtist — Tïtle [HQ]', 'Ärtist - Tïtle', ('Tïtle', 'Ärtist')),
+    ('dj_shadow_-_midnight_in_a_perfect_world_(320kbps)', 'DJ Shadow - Midnight in a Perfect World', ('DJ Shadow', 'Midnight in a Perfect World')),
+    ('The Prodigy - Firestarter [FLAC]', 'The Prodigy - Firestarter', ('The Prodigy', 'Firestarter')),
+    ('  spaced   out  ', 'Spaced Out', ('', 'Spaced Out')),
+    ('Title by Some Artist', 'Title by Some Artist', ('Title', 'Some Artist')),
+    ('a - b', 'A - B', ('A', 'B')),
+    ('Official', '', ('', '')),
+    ('___', '', ('', '')),
+    ('-', '', ('', '')),
+    ('', '', ('', '')),
+    ('x_-_y_-_z', 'X - Y - Z', ('X', 'Y - Z')),
+    ('MC Hammer vs DJ Jazzy Jeff', 'MC Hammer vs DJ Jazzy Jeff', ('', 'MC Hammer vs DJ Jazzy Jeff')),
+    ('Song [[hd]] remix', 'Songremix', ('', 'Songremix')),
+    ('UK garage in the USA', 'UK Garage in the USA', ('', 'UK Garage in the USA')),
+    ('wav-file', 'File', ('', 'File')),
+    ('Audio Slave - Like A Stone (hd)(hq)', 'Slave - Like a Stone', ('Slave', 'Like a Stone')),
+    ('2 Unlimited - No Limit', 'Unlimited - No Limit', ('No Limit', 'Unlimited')),
+]
+
+# The stdlib patterns the RE2 versions stand in for
+STDLIB_PATTERNS = {
+    '_ASCII_WHITESPACE_RE': dj_toolkit._WHITESPACE_RE,
+    '_ASCII_QUALITY_TAGS_RE': dj_toolkit._QUALITY_TAGS_RE,
+    '_ASCII_SEP_RE': dj_toolkit._SEP_RE,
+}
+
+
+class FilenameCleanupTest(unittest.TestCase):
+    def setUp(self):
+        self.app = DJToolkit.__new__(DJToolkit)
+    
+    def check(self, without_ahocorasick, without_re2):
+        patches = dict(STDLIB_PATTERNS) if without_re2 else {}
+        if without_ahocorasick:
+            patches['_QUALITY_TAGS_AUTOMATON'] = None
+        
+        # Results are memoized, so every backend combination starts from empty caches
+        dj_toolkit.clean_filename_part.cache_clear()
+        self.addCleanup(dj_toolkit.clean_filename_part.cache_clear)
+        with mock.patch.dict(vars(dj_toolkit), patches):
+            for text, cleaned, artist_title in CASES:
+                with self.subTest(text=text):
+                    self.assertEqual(dj_toolkit.clean_filename_part(text), cleaned)
+                    self.assertEqual(self.app.extract_artist_title(text), artist_title)
+    
+    def test_installed_backends(self):
+        self.check(without_ahocorasick=False, without_re2=False)
+    
+    def test_without_ahocorasick(self):
+        self.check(without_ahocorasick=True, without_re2=False)
+    
+    def test_without_re2(self):
+        self.check(without_ahocorasick=False, without_re2=True)
+    
+    def test_stdlib_only(self):
+        self.check(without_ahocorasick=True, without_re2=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
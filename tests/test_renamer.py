@@ -0,0 +1,141 @@
+"""Renamer: targets built from tags are safe filenames, and renames never clobber a file"""
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from collections import OrderedDict
+from unittest import mock
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dj_toolkit import DJToolkit
+
+
+class CleanFilenameTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        
+        # Build the app without Tk; no Mixxx database, so tags come from the tag cache
+        self.app = DJToolkit.__new__(DJToolkit)
+        self.app.mixxx_db_path = os.path.join(self.tmp.name, "missing.sqlite")
+        self.app._tag_cache = OrderedDict()
+        self.app._tag_lock = threading.Lock()
+    
+    def name_from_tags(self, artist, title, filename="track.MP3"):
+        path = Path(self.tmp.name) / filename
+        path.touch()
+        self.app._remember_tags((str(path), os.stat(path).st_mtime), (artist, title))
+        return self.app.generate_clean_filename(path)
+    
+    def test_multiline_tags_are_flattened(self):
+        self.assertEqual(self.name_from_tags('Foo', 'Bar\nBaz'), 'Foo - Bar Baz.MP3')
+        self.assertEqual(self.name_from_tags('  foo  bar', 'Line1\r\n\tx '), 'foo bar - Line1 x.MP3')
+    
+    def test_control_characters_are_dropped(self):
+        self.assertEqual(self.name_from_tags('A\x00B', 'C \x07 D\x7f'), 'AB - C D.MP3')
+    
+    def test_blank_tag_falls_back_to_filename(self):
+        self.assertEqual(self.name_from_tags('Foo', '\r\n\x00', 'some_artist - the_long_title.mp3'),
+                         'Foo - The Long Title.mp3')
+
+
+
+class RenameFilesTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.app = DJToolkit.__new__(DJToolkit)
+    
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+    
+    def make(self, *names):
+        # Each file holds its own original name, so moves are easy to follow
+        for name in names:
+            with open(self.path(name), "w") as f:
+                f.write(name)
+    
+    def contents(self):
+        result = {}
+        for name in os.listdir(self.tmp.name):
+            with open(self.path(name)) as f:
+                result[name] = f.read()
+        return result
+    
+    def rename(self, *pairs):
+        statuses = dict(self.app.rename_files([(self.path(src), self.path(dst)) for src, dst in pairs]))
+        return [statuses[i] for i in range(len(pairs))]
+    
+    def test_plain_rename(self):
+        self.make("a")
+        self.assertEqual(self.rename(("a", "b")), ['Renamed'])
+        self.assertEqual(self.contents(), {"b": "a"})
+    
+    def test_existing_target_is_conflict(self):
+        self.make("a", "b")
+        self.assertEqual(self.rename(("a", "b")), ['Conflict'])
+        self.assertEqual(self.contents(), {"a": "a", "b": "b"})
+    
+    def test_duplicate_target_is_conflict(self):
+        self.make("a", "b")
+        self.assertEqual(self.rename(("a", "c"), ("b", "c")), ['Renamed', 'Conflict'])
+        self.assertEqual(self.contents(), {"b": "b", "c": "a"})
+    
+    def test_cycle_is_conflict(self):
+        self.make("a", "b")
+        self.assertEqual(self.rename(("a", "b"), ("b", "a")), ['Conflict', 'Conflict'])
+        self.assertEqual(self.contents(), {"a": "a", "b": "b"})
+    
+    def test_chain_runs_in_dependency_order(self):
+        self.make("a", "b", "c")
+        self.assertEqual(self.rename(("a", "b"), ("b", "c"), ("c", "d")), ['Renamed'] * 3)
+        self.assertEqual(self.contents(), {"b": "a", "c": "b", "d": "c"})
+    
+    def test_chain_onto_existing_file(self):
+        self.make("a", "b", "c")
+        self.assertEqual(self.rename(("a", "b"), ("b", "c")), ['Conflict', 'Conflict'])
+        self.assertEqual(self.contents(), {"a": "a", "b": "b", "c": "c"})
+    
+    def test_chain_beside_cycle(self):
+        self.make("a", "b", "c", "d")
+        statuses = self.rename(("c", "d"), ("a", "b"), ("d", "c"), ("b", "e"))
+        self.assertEqual(statuses, ['Conflict', 'Renamed', 'Conflict', 'Renamed'])
+        self.assertEqual(self.contents(), {"b": "a", "c": "c", "d": "d", "e": "b"})
+    
+    @unittest.skipIf(os.name == 'nt', "symlinks need privileges on Windows")
+    def test_symlink_stays_symlink(self):
+        self.make("target")
+        os.symlink("target", self.path("link"))
+        self.assertEqual(self.rename(("link", "renamed")), ['Renamed'])
+        self.assertTrue(os.path.islink(self.path("renamed")))
+        self.assertEqual(os.readlink(self.path("renamed")), "target")
+        self.assertFalse(os.path.lexists(self.path("link")))
+    
+    @unittest.skipIf(os.name == 'nt', "Windows renames never go through os.link")
+    def test_without_hard_links(self):
+        self.make("a", "b", "c")
+        with mock.patch("os.link", side_effect=PermissionError(1, "Operation not permitted")):
+            self.assertEqual(self.rename(("a", "b"), ("c", "d")), ['Conflict', 'Renamed'])
+        self.assertEqual(self.contents(), {"a": "a", "b": "b", "d": "c"})
+    
+    @unittest.skipIf(os.name == 'nt', "Windows renames never go through os.link")
+    def test_failed_unlink_rolls_back(self):
+        self.make("a")
+        unlink = os.unlink
+        
+        def refuse_source(path):
+            if path == self.path("a"):
+                raise PermissionError(1, "Operation not permitted")
+            unlink(path)
+        
+        with mock.patch("os.unlink", side_effect=refuse_source):
+            self.assertEqual(self.rename(("a", "b")), ['Failed'])
+        self.assertEqual(self.contents(), {"a": "a"})
+
+
+if __name__ == '__main__':
+    unittest.main()